@@ -1,16 +1,129 @@
+import gzip
+import hashlib
+import json
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Any, Iterable
+from functools import lru_cache
+from html import escape
+from typing import Any, Iterable, cast
 
 import dash_bootstrap_components as dbc
 import dash_leaflet as dl
 import numpy as np
 import pandas as pd
-from dash import Dash, Input, Output, State, dcc, html
-from pydantic import ValidationError
+from dash import Dash, Input, Output, State, dcc, html, no_update
+from dash.exceptions import PreventUpdate
+from flask import Response, request
 
 from ..config.models import POIMapConfig
-from ..io.database import POIData, get_data
+from ..io.database import get_data, save_data
+
+# Static map components, built once and shared by every map.
+# Enabled controls:
+# - LocateControl: Locate the user (Browser asks for confirmation).
+# - ScaleControl: Display a scale on the map.
+# Disabled controls:
+# - EditControl: Add, edit and remove markers.
+_TILE_LAYER = dl.TileLayer()
+_MAP_CONTROLS = dl.FeatureGroup(
+    [
+        dl.LocateControl(locateOptions={"enableHighAccuracy": True}),
+        dl.ScaleControl(position="bottomleft"),
+    ]
+)
+
+# Responses that are gzip compressed if the client accepts it.
+_COMPRESS_MIMETYPES = {
+    "application/json",
+    "application/geo+json",
+    "text/html",
+    "text/css",
+    "application/javascript",
+    "text/javascript",
+}
+_COMPRESS_MIN_SIZE = 500
+_COMPRESS_LEVEL = 6
+
+# Number of filter combinations for which the marker GeoJSON is memoized.
+_FILTER_CACHE_SIZE = 64
+
+# Fields of `_POISnapshot` that hold one entry per POI, see `POIMapApp._derive_snapshot`.
+_POI_ARRAYS = (
+    "latitudes",
+    "longitudes",
+    "dates",
+    "titles",
+    "descriptions",
+    "category_labels",
+    "category_bits",
+    "features",
+)
+
+
+@dataclass(eq=False)
+class _POISnapshot:
+    """
+    Parallel per-POI arrays derived from the POI data.
+
+    The arrays of a snapshot are never modified. Adding or removing POIs builds a new snapshot which is published with
+    a single assignment, so a callback that fetches the current snapshot once always works on arrays of equal length,
+    even while another thread changes the POI data. Data that is built from the arrays on first use is cached on the
+    snapshot and dropped together with it.
+    """
+
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    dates: np.ndarray
+    titles: np.ndarray
+    descriptions: np.ndarray
+    category_labels: np.ndarray
+    category_bits: np.ndarray
+    features: np.ndarray
+    category_counts: np.ndarray
+    other_category_counts: Counter[str]
+    version: int = 0
+    date_index: tuple[np.ndarray, np.ndarray] | None = field(default=None, init=False, repr=False)
+    remove_options: dict[int, str] | None = field(default=None, init=False, repr=False)
+    geojson: tuple[bytes, str, bytes, str] | None = field(default=None, init=False, repr=False)
+
+    def append(self, other: "_POISnapshot", version: int) -> "_POISnapshot":
+        """
+        Build a snapshot with the POIs of another snapshot appended.
+
+        :param other: Snapshot of the added POIs.
+        :param version: Version of the new snapshot.
+        :return: New snapshot.
+        """
+        arrays: dict[str, Any] = {
+            name: np.concatenate([getattr(self, name), getattr(other, name)]) for name in _POI_ARRAYS
+        }
+        return _POISnapshot(
+            **arrays,
+            category_counts=self.category_counts + other.category_counts,
+            other_category_counts=self.other_category_counts + other.other_category_counts,
+            version=version,
+        )
+
+    def delete(self, index: int, removed: "_POISnapshot", version: int) -> "_POISnapshot":
+        """
+        Build a snapshot without the POI at the given position.
+
+        :param index: Position of the removed POI.
+        :param removed: Snapshot of the removed POI.
+        :param version: Version of the new snapshot.
+        :return: New snapshot.
+        """
+        arrays: dict[str, Any] = {name: np.delete(getattr(self, name), index) for name in _POI_ARRAYS}
+        return _POISnapshot(
+            **arrays,
+            category_counts=self.category_counts - removed.category_counts,
+            other_category_counts=self.other_category_counts - removed.other_category_counts,
+            version=version,
+        )
 
 
 class POIMapApp:
@@ -27,7 +140,24 @@ class POIMapApp:
         self._log.setLevel(config.loglevel)
 
         self.config = config
-        self.df = get_data(config.database)
+        self._statistics: tuple[tuple[tuple[str, int], ...], dbc.Table] | None = None
+        self._category_index = {category: i for i, category in enumerate(config.categories)}
+        self._filtered_geojson = lru_cache(maxsize=_FILTER_CACHE_SIZE)(self._build_filtered_geojson)
+
+        # The POI data is loaded in the background while the app is set up, see `wait_for_data`.
+        # The table and the snapshot of its derived arrays are only changed together while holding `_df_lock`.
+        self._df: pd.DataFrame
+        self._new_pois: list[pd.DataFrame] = []
+        self._pois: _POISnapshot
+        self._df_lock = threading.Lock()
+        self._center: list[float]
+        self._data_loaded = threading.Event()
+        self._data_error: Exception | None = None
+        threading.Thread(target=self._load_data, name="poi-data-loader", daemon=True).start()
+        # Changes are persisted by a single worker so that writes happen in order and never overlap.
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="poi-data-writer")
+        self._write_lock = threading.Lock()
+        self._write_pending = False
 
         self.app = Dash(
             __name__,
@@ -36,6 +166,7 @@ class POIMapApp:
             assets_folder="../assets",
         )
         self.init_callbacks()
+        self.init_routes()
 
     def init_callbacks(self) -> None:
         """
@@ -49,61 +180,433 @@ class POIMapApp:
             filtered_categories: Iterable,
             start_date: str,
             end_date: str,
-        ) -> list:
+            shown_selection: str | None,
+        ) -> tuple[dict, str]:
             """
             Filter markers based on selected categories and date range.
 
+            Only the data of the markers layer is replaced, the tile layer and controls stay mounted. While the user is
+            picking a date range and only one end of it is set, the markers are left as they are.
+
             :param filtered_categories: List of selected categories.
             :param start_date: Start date of the date range.
             :param end_date: End date of the date range.
-            :return: Map with Tile Layer, markers and controls.
+            :param shown_selection: Key of the POI selection that is currently shown.
+            :return: GeoJSON FeatureCollection of the selected POIs and the key of the selection.
             """
-            selected = self.df[self.df.category.apply(lambda category: any(x in category for x in filtered_categories))]
-
-            if start_date is not None and end_date is not None:
-                start_date_ = date.fromisoformat(start_date)
-                end_date_ = date.fromisoformat(end_date)
-                selected = selected[(selected.date >= start_date_) & (selected.date <= end_date_)]
+            if (start_date is None) != (end_date is None):
+                raise PreventUpdate
 
-            return self.build_map()
+            return self.get_filtered_markers(filtered_categories, start_date, end_date, shown_selection)
 
         self.app.callback(
-            Output(component_id="map", component_property="children"),
+            Output(component_id="map-markers", component_property="data", allow_duplicate=True),
+            Output(component_id="map-markers-selection", component_property="data", allow_duplicate=True),
             Input(component_id="category-filter", component_property="value"),
             Input(component_id="date-filter", component_property="start_date"),
             Input(component_id="date-filter", component_property="end_date"),
+            State(component_id="map-markers-selection", component_property="data"),
+            prevent_initial_call=True,
         )(filter_markers)
 
-    def get_markers(self, df: pd.DataFrame) -> list[dict]:
+    def init_routes(self) -> None:
+        """
+        Attach additional routes to the underlying Flask server.
+
+        The following routes are attached:
+        - pois.geojson: All POIs as GeoJSON FeatureCollection, fetched by the markers layer. Like the Dash routes, it is
+          served below `routes_pathname_prefix`.
+
+        Additionally, text responses (layout, callback results, POI data) are gzip compressed.
+        """
+
+        def serve_pois() -> Response:
+            """
+            Serve all POIs as GeoJSON.
+
+            The serialized data is cached until the POIs change and tagged with an ETag. Clients revalidate on every
+            request and get an empty "304 Not Modified" response as long as the POIs did not change. Clients that
+            accept gzip get the cached compressed data, which has its own ETag.
+
+            :return: Response with the GeoJSON FeatureCollection.
+            """
+            self.wait_for_data()
+            compressed = "gzip" in request.headers.get("Accept-Encoding", "")
+            data, etag = self.get_pois_geojson(compressed)
+
+            response = Response(data, mimetype="application/geo+json")
+            if compressed:
+                response.headers["Content-Encoding"] = "gzip"
+            response.vary.add("Accept-Encoding")
+            response.set_etag(etag)
+            response.cache_control.no_cache = True
+            response.make_conditional(request)
+            return response
+
+        def compress_response(response: Response) -> Response:
+            """
+            Gzip compress a text response if the client accepts it.
+
+            :param response: Response to be sent.
+            :return: Compressed response.
+            """
+            if (
+                response.status_code != 200
+                or response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in _COMPRESS_MIMETYPES
+                or "gzip" not in request.headers.get("Accept-Encoding", "")
+            ):
+                return response
+
+            data = response.get_data()
+            if len(data) >= _COMPRESS_MIN_SIZE:
+                response.set_data(gzip.compress(data, compresslevel=_COMPRESS_LEVEL))
+                response.headers["Content-Encoding"] = "gzip"
+                response.vary.add("Accept-Encoding")
+            return response
+
+        self.app.server.route(f"{self.app.config.routes_pathname_prefix}pois.geojson")(serve_pois)
+        self.app.server.after_request(compress_response)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        POI data.
+
+        Added POIs are buffered and only appended to the table when it is read, so that adding a POI does not copy the
+        whole table. The table is not modified in place, it is replaced whenever it changes.
+        """
+        with self._df_lock:
+            return self._get_df()
+
+    @df.setter
+    def df(self, df: pd.DataFrame) -> None:
+        pois = self._derive_snapshot(df)
+        with self._df_lock:
+            self._df = df
+            self._new_pois = []
+            self._publish(pois)
+
+    def _get_df(self) -> pd.DataFrame:
+        """
+        Get the POI data with all buffered POIs appended. Must be called while holding `_df_lock`.
+
+        :return: POI data.
+        """
+        if self._new_pois:
+            self._df = pd.concat([self._df, *self._new_pois], ignore_index=True)
+            self._new_pois = []
+        return self._df
+
+    def add_pois(self, df: pd.DataFrame) -> None:
+        """
+        Add POIs to the POI data.
+
+        The derived arrays of the new POIs are built before taking the lock. The buffered table and the published
+        snapshot are then updated together, so readers never see one without the other.
+
+        :param df: POIs to add.
+        """
+        added = self._derive_snapshot(df)
+        with self._df_lock:
+            self._new_pois.append(df)
+            self._publish(self._pois.append(added, self._pois.version + 1))
+
+    def remove_poi(self, index: int) -> pd.Series:
+        """
+        Remove a POI from the POI data.
+
+        :param index: Position of the POI.
+        :return: The removed POI.
+        """
+        with self._df_lock:
+            df = self._get_df()
+            removed = df.iloc[index]
+            self._df = df.drop(df.index[index])
+            self._df.index = pd.RangeIndex(len(self._df))
+            self._publish(self._pois.delete(index, self._derive_snapshot(df.iloc[[index]]), self._pois.version + 1))
+        return removed
+
+    def _publish(self, pois: _POISnapshot) -> None:
+        """
+        Publish a new snapshot of the derived arrays. Must be called while holding `_df_lock`.
+
+        :param pois: New snapshot.
+        """
+        self._pois = pois
+        self._filtered_geojson.cache_clear()
+
+    def _load_data(self) -> None:
+        """
+        Load the POI data and precompute derived data.
+
+        This includes the center of the map and the serialized GeoJSON of all POIs, which is served to every client on
+        page load. This runs in a background thread. Errors are stored and raised by `wait_for_data`.
         """
-        Get a list of serialized marker data based on the DataFrame.
+        try:
+            df = get_data(self.config.database)
+            self.df = df
+            self._center = [float(df.latitude.median()), float(df.longitude.median())]
+            self.get_pois_geojson()
+            self._log.debug(f"Loaded {len(df)} POIs.")
+        except Exception as e:
+            self._data_error = e
+        finally:
+            self._data_loaded.set()
+
+    def wait_for_data(self) -> None:
+        """
+        Block until the POI data is loaded.
+
+        :raises RuntimeError: If the POI data could not be loaded.
+        """
+        self._data_loaded.wait()
+        if self._data_error is not None:
+            raise RuntimeError(f"Could not load POI data from {self.config.database}.") from self._data_error
+
+    def get_pois_geojson(self, compressed: bool = False) -> tuple[bytes, str]:
+        """
+        Get all POIs as serialized GeoJSON FeatureCollection.
+
+        The serialized data and its gzip compressed version are built once and reused until the POI data changes. The
+        two versions have different ETags, as required for different content encodings of the same resource.
+
+        :param compressed: Whether to get the gzip compressed data.
+        :return: Serialized GeoJSON and its ETag.
+        """
+        pois = self._pois
+        if pois.geojson is None:
+            data = json.dumps(self.build_geojson(pois=pois), separators=(",", ":")).encode()
+            etag = hashlib.md5(data, usedforsecurity=False).hexdigest()
+            pois.geojson = data, etag, gzip.compress(data, compresslevel=_COMPRESS_LEVEL), f"{etag}-gzip"
+        if compressed:
+            return pois.geojson[2], pois.geojson[3]
+        return pois.geojson[0], pois.geojson[1]
+
+    def persist_data(self) -> None:
+        """
+        Persist the POI data to the database in the background.
+
+        The callbacks do not wait for the write to finish. Writes are coalesced: while a write is still waiting to
+        start, further changes are picked up by that write instead of queueing another one. Pending writes are
+        finished before the interpreter exits.
+        """
+        with self._write_lock:
+            if self._write_pending:
+                return
+            self._write_pending = True
+        self._io_pool.submit(self._write_data)
 
-        :param df: DataFrame with POI data.
-        :return: List of serialized marker data.
+    def _write_data(self) -> None:
         """
+        Write the current POI data to the database.
+
+        The pending flag is cleared before the data is read, so changes made while the buffered POIs are appended are
+        either part of this write or queue the next one. `persist_data` does not wait for the table to be built.
+        """
+        with self._write_lock:
+            self._write_pending = False
+        df = self.df
+        try:
+            save_data(df, self.config.database)
+        except Exception:
+            self._log.exception(f"Could not persist database {self.config.database}.")
+        else:
+            self._log.info("Persisted database.")
+
+    def _derive_snapshot(self, df: pd.DataFrame) -> _POISnapshot:
+        """
+        Derive the parallel arrays for the given POIs.
+
+        The POI data is stored as parallel arrays (one per column) so that filtering and building markers do not have
+        to go through the DataFrame. Coordinates are stored as float32 which is precise to about a meter. The
+        categories of each POI are stored as an integer bitmask in which bit i is set if the POI is in the i-th
+        configured category. The GeoJSON feature of each POI is built here as well, so that markers only have to be
+        selected and not rebuilt when filtering.
+
+        :param df: POI data.
+        :return: Snapshot of the derived arrays.
+        """
+        latitudes = df.latitude.to_numpy(np.float32)
+        longitudes = df.longitude.to_numpy(np.float32)
+        dates = df.date.to_numpy("datetime64[D]")
+        titles = df.title.to_numpy(object)
+        descriptions = df.description.to_numpy(object)
+        category_labels = np.array([", ".join(categories) for categories in df.category], dtype=object)
+        category_bits = np.fromiter(
+            (
+                sum(1 << self._category_index[category] for category in set(categories) & self._category_index.keys())
+                for categories in df.category
+            ),
+            dtype=np.min_scalar_type((1 << len(self.config.categories)) - 1),
+            count=len(df),
+        )
+        features = np.empty(len(df), dtype=object)
+        features[:] = self._build_features(latitudes, longitudes, dates, titles, descriptions, category_labels)
+        return _POISnapshot(
+            latitudes,
+            longitudes,
+            dates,
+            titles,
+            descriptions,
+            category_labels,
+            category_bits,
+            features,
+            category_counts=self._count_categories(category_bits),
+            other_category_counts=Counter(
+                str(category)
+                for categories in df.category
+                for category in set(categories) - self._category_index.keys()
+            ),
+        )
+
+    def _build_features(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        dates: np.ndarray,
+        titles: np.ndarray,
+        descriptions: np.ndarray,
+        category_labels: np.ndarray,
+    ) -> list[dict]:
+        """
+        Build the GeoJSON point features of POIs.
+
+        The features are built directly as the plain dicts that are sent to the markers layer, in a single pass over
+        the POI arrays. dash-leaflet binds the `tooltip` property of a feature as the tooltip of its marker. Coordinates
+        are tuples, which take less memory than lists and serialize to the same JSON.
+
+        :param latitudes: Latitudes of the POIs.
+        :param longitudes: Longitudes of the POIs.
+        :param dates: Dates of the POIs.
+        :param titles: Titles of the POIs.
+        :param descriptions: Descriptions of the POIs.
+        :param category_labels: Comma-separated categories of the POIs.
+        :return: List of GeoJSON features.
+        """
+        rounded_latitudes = cast(list[float], latitudes.astype(np.float64).round(5).tolist())
+        rounded_longitudes = cast(list[float], longitudes.astype(np.float64).round(5).tolist())
         return [
             {
-                "position": [row.latitude, row.longitude],
-                "title": row.title,
-                "date": row.date.isoformat(),
-                "category": row.category,
-                "description": row.description,
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": (longitude, latitude)},
+                "properties": {"tooltip": self.format_tooltip(title, date_, category, description)},
             }
-            for _, row in df.iterrows()
+            for latitude, longitude, title, date_, category, description in zip(
+                rounded_latitudes,
+                rounded_longitudes,
+                titles,
+                np.datetime_as_string(dates, unit="D"),
+                category_labels,
+                descriptions,
+                strict=True,
+            )
         ]
 
+    def _count_categories(self, category_bits: np.ndarray) -> np.ndarray:
+        """
+        Count the POIs per category.
+
+        :param category_bits: Category bitmasks of the POIs.
+        :return: Number of POIs in each configured category.
+        """
+        return np.array(
+            [
+                np.count_nonzero(category_bits & np.array(1 << i, dtype=category_bits.dtype))
+                for i in range(len(self.config.categories))
+            ],
+            dtype=np.int64,
+        )
+
+    def _get_date_index(self, pois: _POISnapshot) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the POI positions sorted by date together with the sorted dates.
+
+        The POI data itself keeps its order, the index is built on first use and reused until the POI data changes.
+
+        :param pois: Snapshot of the derived arrays.
+        :return: Positions of the POIs in date order and their dates.
+        """
+        if pois.date_index is None:
+            order = np.argsort(pois.dates, kind="stable")
+            pois.date_index = order, pois.dates[order]
+        return pois.date_index
+
+    def filter_data(
+        self,
+        filtered_categories: Iterable,
+        start_date: str | None,
+        end_date: str | None,
+        pois: _POISnapshot | None = None,
+    ) -> np.ndarray:
+        """
+        Select the POIs that match the category and date filters.
+
+        :param filtered_categories: List of selected categories.
+        :param start_date: Start date of the date range.
+        :param end_date: End date of the date range.
+        :param pois: Snapshot of the derived arrays to select from. Defaults to the current one.
+        :return: Positions of the selected POIs in data order.
+        """
+        if pois is None:
+            pois = self._pois
+        selected_bits = np.array(
+            sum(1 << self._category_index[category] for category in set(filtered_categories)),
+            dtype=pois.category_bits.dtype,
+        )
+
+        if start_date is None or end_date is None:
+            return np.flatnonzero(pois.category_bits & selected_bits)
+
+        order, dates = self._get_date_index(pois)
+        start = np.searchsorted(dates, np.datetime64(start_date, "D"), side="left")
+        end = np.searchsorted(dates, np.datetime64(end_date, "D"), side="right")
+        candidates = np.sort(order[start:end])
+        return candidates[(pois.category_bits[candidates] & selected_bits) != 0]
+
+    def get_markers(self, selected: np.ndarray | None = None, pois: _POISnapshot | None = None) -> list[dict]:
+        """
+        Get the GeoJSON point features of the selected POIs.
+
+        The features are precomputed per POI, see `_derive_snapshot`.
+
+        :param selected: Boolean mask or indices of the selected POIs. Defaults to all POIs.
+        :param pois: Snapshot of the derived arrays to select from. Defaults to the current one.
+        :return: List of GeoJSON features.
+        """
+        if pois is None:
+            pois = self._pois
+        if selected is None:
+            return pois.features.tolist()
+        return pois.features[selected].tolist()
+
     def get_statistics(self) -> dbc.Table:
         """
         Get statistics of the POI data.
 
+        The number of POIs per category is kept up to date when POIs are added or removed. Categories that occur in
+        the POI data but are not configured are counted as well. The table is cached by these counts, so it is only
+        rebuilt when a count changes.
+
         :return: Table with statistics.
         """
-        return dbc.Table.from_dataframe(
-            pd.DataFrame(self.df.category.explode().value_counts()).reset_index(),
-            striped=True,
-            bordered=False,
-            hover=True,
+        self.wait_for_data()
+        pois = self._pois
+        counts = (
+            *zip(self.config.categories, pois.category_counts.tolist(), strict=True),
+            *sorted(pois.other_category_counts.items()),
         )
+        if self._statistics is None or self._statistics[0] != counts:
+            statistics = pd.DataFrame(counts, columns=["category", "count"])
+            table = dbc.Table.from_dataframe(
+                statistics[statistics["count"] > 0].sort_values("count", ascending=False, kind="stable"),
+                striped=True,
+                bordered=False,
+                hover=True,
+            )
+            self._statistics = counts, table
+        return self._statistics[1]
 
     def build_sidebar(self) -> None:
         """
@@ -143,7 +646,7 @@ class POIMapApp:
                     [
                         html.Hr(),
                         html.H3("Statistics"),
-                        self.get_statistics(),
+                        html.Div(id="statistics", children=self.get_statistics()),
                     ],
                     className="bottom",
                 ),
@@ -153,23 +656,18 @@ class POIMapApp:
         self.attach_new_poi_callbacks()
         self.attach_remove_poi_callbacks()
 
-    def build_map_controls(self) -> dl.FeatureGroup:
+    def build_geojson(self, selected: np.ndarray | None = None, pois: _POISnapshot | None = None) -> dict:
         """
-        Build a FeatureGroup of map controls.
+        Build a GeoJSON FeatureCollection of the selected POIs.
 
-        Enabled controls:
-        - LocateControl: Locate the user (Brwoser asks for confirmation).
-        - ScaleControl: Display a scale on the map.
-
-        Disabled controls:
-        - EditControl: Add, edit and remove markers.
-
-        :return: FeatureGroup of map controls.
+        :param selected: Boolean mask or indices of the selected POIs. Defaults to all POIs.
+        :param pois: Snapshot of the derived arrays to select from. Defaults to the current one.
+        :return: GeoJSON FeatureCollection.
         """
-        locate_control = dl.LocateControl(locateOptions={"enableHighAccuracy": True})
-        scale_control = dl.ScaleControl(position="bottomleft")
-
-        return dl.FeatureGroup([locate_control, scale_control])
+        return {
+            "type": "FeatureCollection",
+            "features": self.get_markers(selected, pois),
+        }
 
     def build_map(self) -> list:
         """
@@ -178,17 +676,23 @@ class POIMapApp:
         :return: List of map components.
         """
         return [
-            dl.TileLayer(),
-            dl.FeatureGroup(
-                id="map-markers", children=[self.format_marker(marker) for marker in self.get_markers(self.df)]
+            _TILE_LAYER,
+            dl.GeoJSON(
+                id="map-markers",
+                url=self.app.get_relative_path("/pois.geojson"),
+                cluster=True,
+                zoomToBoundsOnClick=True,
             ),
-            self.build_map_controls(),
+            _MAP_CONTROLS,
         ]
 
     def build_main(self) -> None:
         """
         Build the main part of the app (the map window).
+
+        The map is centered on the POIs, so this waits for the POI data to be loaded.
         """
+        self.wait_for_data()
         self.content = html.Div(
             [
                 html.Div(
@@ -209,12 +713,13 @@ class POIMapApp:
                     className="main main-button",
                 ),
                 dl.Map(
-                    center=[self.df.latitude.median(), self.df.longitude.median()],
+                    center=self._center,
                     zoom=self.config.zoomlevel,
                     style={"height": "100vh"},
                     children=self.build_map(),
                     id="map",
                 ),
+                dcc.Store(id="map-markers-selection"),
                 html.Div(id="out"),
                 html.Div(
                     id="user-response",
@@ -374,58 +879,92 @@ class POIMapApp:
         self._attach_open_new_modal_callback()
         self._attach_create_poi_callback()
         self._attach_update_markers_callback()
+        self._attach_update_statistics_callback()
 
     def _attach_show_toast_callback(self) -> None:
         """
         Attach a callback to show a toast message for the user to click on the map.
-        """
-
-        def show_toast(n_clicks: int) -> tuple[bool, bool, bool]:
-            return True, True, True
 
-        self.app.callback(
+        This only toggles the UI, so it runs in the browser without a round trip to the server.
+        """
+        self.app.clientside_callback(
+            "function(n_clicks) { return [true, true, true]; }",
             Output("add-poi-toast", "is_open", allow_duplicate=True),
             Output("add-poi-modal-open", "disabled", allow_duplicate=True),
             Output("remove-poi-modal-open", "disabled", allow_duplicate=True),
             Input("add-poi-modal-open", "n_clicks"),
             prevent_initial_call=True,
-        )(show_toast)
+        )
 
     def _attach_open_new_modal_callback(self) -> None:
         """
         Attach a callback to open the "new POI" modal.
-        """
 
-        def open_modal(coordinates: dict, is_open_modal: bool, is_open_toast: bool) -> tuple[str, bool, bool]:
-            if coordinates and is_open_toast and not is_open_modal:
-                lat, lng = coordinates["latlng"]["lat"], coordinates["latlng"]["lng"]
-                self._log.debug(f"user clicked coordinates: {coordinates}")
-                return f"({lat:.3f}, {lng:.3f})", True, False
-            else:
-                return "(NaN, NaN)", False, False
-
-        self.app.callback(
+        This only toggles the UI and formats the clicked coordinates, so it runs in the browser without a round trip to
+        the server.
+        """
+        self.app.clientside_callback(
+            """
+            function(coordinates, is_open_modal, is_open_toast) {
+                if (coordinates && is_open_toast && !is_open_modal) {
+                    const latlng = coordinates.latlng;
+                    return ["(" + latlng.lat.toFixed(3) + ", " + latlng.lng.toFixed(3) + ")", true, false];
+                }
+                return ["(NaN, NaN)", false, false];
+            }
+            """,
             Output("add-poi-location", "children"),
             Output("add-poi-modal", "is_open", allow_duplicate=True),
             Output("add-poi-toast", "is_open"),
             Input("map", "clickData"),
             [State("add-poi-modal", "is_open"), State("add-poi-toast", "is_open")],
             prevent_initial_call=True,
-        )(open_modal)
+        )
 
-    def _validate_poi(self, poi: pd.DataFrame) -> pd.DataFrame:
+    def _validate_poi(
+        self,
+        latitude: float,
+        longitude: float,
+        category: list[str] | None,
+        date: str | None,
+        title: str | None,
+        description: str | None,
+    ) -> bool:
         """
-        Validate a POI.
-
-        :param poi: POI to be validated.
-        :return: Validated POI.
+        Validate a new POI.
+
+        This checks the same constraints as the `POIData` schema, which validates the whole database when it is
+        loaded, and additionally that there is at least one category and all categories are configured. Checking the
+        values of a single POI directly is much cheaper than validating a one-row DataFrame. Validation errors are
+        logged.
+
+        :param latitude: Latitude of the POI.
+        :param longitude: Longitude of the POI.
+        :param category: Categories of the POI.
+        :param date: Date of the POI in ISO format.
+        :param title: Title of the POI.
+        :param description: Description of the POI.
+        :return: Whether the POI is valid.
         """
+        errors = []
+        if not -90.0 <= latitude <= 90.0:
+            errors.append(f"latitude {latitude} is out of range")
+        if not -180.0 <= longitude <= 180.0:
+            errors.append(f"longitude {longitude} is out of range")
+        if not isinstance(category, list) or not category or not all(c in self._category_index for c in category):
+            errors.append(f"category {category} is not a non-empty list of configured categories")
         try:
-            return POIData.validate(poi)
-        except ValidationError as e:
-            self._log.error(f"Validation error for new POI: {e}")
-            self._log.error(poi)
-            self._log.error(f"Traceback: {e}")
+            datetime.strptime(date, "%Y-%m-%d")  # type:ignore[arg-type]
+        except (TypeError, ValueError):
+            errors.append(f"date {date} is not a valid date")
+        if not isinstance(title, str):
+            errors.append("title is missing")
+        if not isinstance(description, str):
+            errors.append("description is missing")
+
+        for error in errors:
+            self._log.error(f"Validation error for new POI: {error}")
+        return not errors
 
     def _attach_create_poi_callback(self) -> None:
         """
@@ -436,26 +975,35 @@ class POIMapApp:
             n_clicks: int,
             coordinates: dict,
             title: str,
-            category: str,
+            category: list[str],
             date: str,
             description: str,
             is_open_toast: bool,
             is_open_success: bool,
-        ) -> tuple[bool, bool, str, bool, bool, str | None, str | None, str, str | None, int]:
+        ) -> tuple[Any, bool, Any, bool, bool, Any, Any, Any, Any, Any]:
             if not is_open_toast:
+                # The modal is closed. Leave it as it is: a map click also opens it in the browser, and this response
+                # arrives after that.
                 return (
+                    no_update,
                     False,
-                    False,
-                    "None",
+                    no_update,
                     False,
                     False,
                     None,
                     None,
-                    date,
+                    no_update,
                     None,
-                    0,
+                    0 if n_clicks else no_update,
+                )
+            elif (
+                is_open_toast
+                and n_clicks > 0
+                and coordinates
+                and self._validate_poi(
+                    coordinates["latlng"]["lat"], coordinates["latlng"]["lng"], category, date, title, description
                 )
-            elif is_open_toast and n_clicks > 0 and coordinates:
+            ):
                 lat, lng = coordinates["latlng"]["lat"], coordinates["latlng"]["lng"]
                 new_poi = pd.DataFrame(
                     {
@@ -467,13 +1015,11 @@ class POIMapApp:
                         "description": [description],
                     }
                 )
-                new_poi = self._validate_poi(new_poi)
-                self.df = pd.concat([self.df, new_poi]).reset_index(drop=True)
+                self.add_pois(new_poi)
                 self._log.info("Added POI:")
                 self._log.info(new_poi)
 
-                self.df.to_parquet(self.config.database)
-                self._log.info("Persisted database.")
+                self.persist_data()
 
                 return (
                     False,
@@ -483,7 +1029,7 @@ class POIMapApp:
                     False,
                     None,
                     None,
-                    date,
+                    no_update,
                     None,
                     n_clicks,
                 )
@@ -491,14 +1037,14 @@ class POIMapApp:
                 return (
                     True,
                     False,
-                    "None",
+                    no_update,
                     False,
                     False,
-                    title,
-                    category,
-                    date,
-                    description,
-                    0,
+                    no_update,
+                    no_update,
+                    no_update,
+                    no_update,
+                    0 if n_clicks else no_update,
                 )
 
         self.app.callback(
@@ -515,12 +1061,12 @@ class POIMapApp:
             [
                 Input("add-poi-modal-create", "n_clicks"),
                 Input("map", "clickData"),
-                Input("add-poi-title", "value"),
-                Input("add-poi-category", "value"),
-                Input("add-poi-date", "date"),
-                Input("add-poi-description", "value"),
             ],
             [
+                State("add-poi-title", "value"),
+                State("add-poi-category", "value"),
+                State("add-poi-date", "date"),
+                State("add-poi-description", "value"),
                 State("add-poi-modal", "is_open"),
                 State("new-poi-success", "is_open"),
             ],
@@ -568,6 +1114,25 @@ class POIMapApp:
             is_open=False,
         )
 
+    def get_remove_options(self) -> dict[int, str]:
+        """
+        Get the options of the dropdown to select the POI to remove.
+
+        The options are built once and reused until the POI data changes.
+
+        :return: Label of each POI, keyed by its position.
+        """
+        pois = self._pois
+        if pois.remove_options is None:
+            dropdown_text_length = 80
+            options = {}
+            for i, (t, d) in enumerate(zip(pois.titles, pois.descriptions, strict=True)):
+                if len(d) > dropdown_text_length - len(t) - 6:
+                    d = f"{d[:dropdown_text_length-len(t)-6]}..."
+                options[i] = f"{t} ({d})"
+            pois.remove_options = options
+        return pois.remove_options
+
     def attach_remove_poi_callbacks(self) -> None:
         """
         Attach callbacks that handle removing a POI.
@@ -582,15 +1147,7 @@ class POIMapApp:
         """
 
         def open_modal(n_clicks: int, is_open: bool) -> tuple[bool, dict]:
-            dropdown_text_length = 80
-            options = {}
-            for i, row in self.df.iterrows():
-                t = row.title
-                d = row.description
-                if len(d) > dropdown_text_length - len(t) - 6:
-                    d = f"{d[:dropdown_text_length-len(t)-6]}..."
-                options[i] = f"{t} ({d})"
-            return True, options
+            return True, self.get_remove_options()
 
         self.app.callback(
             Output("remove-poi-modal", "is_open"),
@@ -607,11 +1164,9 @@ class POIMapApp:
 
         def update_remove_modal(value: str) -> tuple[str, str, str]:
             if value:
-                selected = self.df.iloc[int(value)]
-                title = selected.title
-                category = f"{', '.join(selected.category)}"
-                description = selected.description
-                return title, category, description
+                index = int(value)
+                pois = self._pois
+                return pois.titles[index], pois.category_labels[index], pois.descriptions[index]
             else:
                 return "Select a POI to remove.", "", ""
 
@@ -629,25 +1184,23 @@ class POIMapApp:
         """
 
         def remove_poi(
-            value: str,
             n_clicks: int,
+            value: str,
             is_open_modal: bool,
             is_open_success: bool,
-        ) -> tuple[bool, int, bool, str | None, str | None]:
+        ) -> tuple[bool, Any, bool, Any, Any]:
             if not is_open_modal:
-                return False, 0, False, None, None
+                return False, 0 if n_clicks else no_update, False, no_update, None
             elif value is not None and is_open_modal and n_clicks > 0:
-                selected = self.df.iloc[int(value)]
-                self.df = self.df.drop(int(value)).reset_index(drop=True)
+                selected = self.remove_poi(int(value))
                 self._log.info("Removed POI:")
                 self._log.info(selected)
 
-                self.df.to_parquet(self.config.database)
-                self._log.info("Persisted database.")
+                self.persist_data()
 
                 return (False, 0, True, f'Removed POI "{selected.title}"', None)
             else:
-                return True, 0, False, None, value
+                return True, 0 if n_clicks else no_update, False, no_update, no_update
 
         self.app.callback(
             Output("remove-poi-modal", "is_open", allow_duplicate=True),
@@ -655,11 +1208,9 @@ class POIMapApp:
             Output("remove-poi-success", "is_open", allow_duplicate=True),
             Output("remove-poi-success", "children"),
             Output("remove-poi-dropdown", "value"),
+            Input("remove-poi-modal-remove", "n_clicks"),
             [
-                Input("remove-poi-dropdown", "value"),
-                Input("remove-poi-modal-remove", "n_clicks"),
-            ],
-            [
+                State("remove-poi-dropdown", "value"),
                 State("remove-poi-modal", "is_open"),
                 State("remove-poi-success", "is_open"),
             ],
@@ -671,46 +1222,125 @@ class POIMapApp:
         Attach a callback to update the markers on the map.
         """
 
-        def update_markers(df: pd.DataFrame) -> dl.FeatureGroup:
+        def update_markers(
+            create_clicks: int,
+            remove_clicks: int,
+            filtered_categories: Iterable,
+            start_date: str,
+            end_date: str,
+            shown_selection: str | None,
+        ) -> tuple[dict, str]:
             """
-            Generate updated markers based on the current DataFrame.
+            Generate updated markers based on the current DataFrame and the active filters.
 
-            :param df: The updated DataFrame.
-            :return: A list of updated map components.
+            :param create_clicks: Number of clicks on the "create" button (trigger only).
+            :param remove_clicks: Number of clicks on the "remove" button (trigger only).
+            :param filtered_categories: List of selected categories.
+            :param start_date: Start date of the date range.
+            :param end_date: End date of the date range.
+            :param shown_selection: Key of the POI selection that is currently shown.
+            :return: GeoJSON FeatureCollection of the selected POIs and the key of the selection.
             """
-            self._log.debug(f"Updating markers with {len(df)} entries.")
-            return dl.FeatureGroup([self.format_marker(marker) for marker in self.get_markers(df)])
+            self._log.debug(f"Updating markers with {len(self._pois.features)} entries.")
+            return self.get_filtered_markers(filtered_categories, start_date, end_date, shown_selection)
 
         self.app.callback(
-            Output("map-markers", "children"),
+            Output("map-markers", "data"),
+            Output("map-markers-selection", "data"),
             [
                 Input("add-poi-modal-create", "n_clicks"),
                 Input("remove-poi-modal-remove", "n_clicks"),
             ],
+            [
+                State("category-filter", "value"),
+                State("date-filter", "start_date"),
+                State("date-filter", "end_date"),
+                State("map-markers-selection", "data"),
+            ],
             prevent_initial_call=True,
-        )(lambda _create_clicks, _remove_clicks: update_markers(self.df))
+        )(update_markers)
 
-    def format_marker(self, marker: dict) -> dl.Marker:
-        return dl.Marker(
-            position=marker["position"],
-            children=[
-                dl.Tooltip(
-                    children=[
-                        html.Div(
-                            [
-                                html.B(marker["title"]),
-                                html.Br(),
-                                html.Span(marker["date"]),
-                                html.Br(),
-                                html.I(", ".join(marker["category"])),
-                                html.Br(),
-                                html.Span(marker["description"]),
-                            ],
-                            className="marker-tooltip",
-                        )
-                    ]
-                )
+    def get_filtered_markers(
+        self,
+        filtered_categories: Iterable,
+        start_date: str | None,
+        end_date: str | None,
+        shown_selection: str | None = None,
+    ) -> tuple[dict, str]:
+        """
+        Get the markers of the POIs that match the category and date filters.
+
+        Each selection of POIs is identified by a key. If the filters select exactly the POIs that are already shown,
+        e.g. because the date range changed but no POI entered or left it, the update is skipped.
+
+        :param filtered_categories: List of selected categories.
+        :param start_date: Start date of the date range.
+        :param end_date: End date of the date range.
+        :param shown_selection: Key of the POI selection that is currently shown.
+        :raises PreventUpdate: If the selected POIs are already shown.
+        :return: GeoJSON FeatureCollection of the selected POIs and the key of the selection.
+        """
+        geojson, selection = self._filtered_geojson(
+            self._pois, tuple(sorted(set(filtered_categories))), start_date, end_date
+        )
+        if selection == shown_selection:
+            raise PreventUpdate
+        return geojson, selection
+
+    def _build_filtered_geojson(
+        self,
+        pois: _POISnapshot,
+        filtered_categories: tuple[str, ...],
+        start_date: str | None,
+        end_date: str | None,
+    ) -> tuple[dict, str]:
+        """
+        Build a GeoJSON FeatureCollection of the POIs that match the category and date filters.
+
+        This is memoized as `self._filtered_geojson` so that toggling back to a previously seen filter combination does
+        not rebuild the features. The snapshot is part of the cache key, and the cache is cleared whenever a new
+        snapshot is published.
+
+        :param pois: Snapshot of the derived arrays to select from.
+        :param filtered_categories: Sorted tuple of selected categories.
+        :param start_date: Start date of the date range.
+        :param end_date: End date of the date range.
+        :return: GeoJSON FeatureCollection of the selected POIs and the key of the selection.
+        """
+        selected = self.filter_data(filtered_categories, start_date, end_date, pois)
+        selection = f"{pois.version}-{hashlib.md5(selected.tobytes(), usedforsecurity=False).hexdigest()}"
+        return self.build_geojson(selected, pois), selection
+
+    def _attach_update_statistics_callback(self) -> None:
+        """
+        Attach a callback to update the statistics after POIs were added or removed.
+        """
+        self.app.callback(
+            Output("statistics", "children"),
+            [
+                Input("add-poi-modal-create", "n_clicks"),
+                Input("remove-poi-modal-remove", "n_clicks"),
             ],
+            prevent_initial_call=True,
+        )(lambda _create_clicks, _remove_clicks: self.get_statistics())
+
+    def format_tooltip(self, title: str, date: str, category: str, description: str) -> str:
+        """
+        Format the HTML tooltip of a marker.
+
+        :param title: Title of the POI.
+        :param date: Date of the POI in ISO format.
+        :param category: Comma-separated categories of the POI.
+        :param description: Description of the POI.
+        :return: HTML of the tooltip.
+        """
+        return (
+            '<div class="marker-tooltip">'
+            f"<b>{escape(title)}</b><br>"
+            f"<span>{date}</span><br>"
+            f"<i>{escape(category)}</i><br>"
+            f"<span>{escape(description)}</span>"
+            "</div>"
         )
 
     def build(self) -> None:
@@ -1,9 +1,7 @@
 import logging
-import pprint
 import sys
 from typing import Sequence
 
-from ..app.app import POIMapApp
 from .parser import parse_config
 
 log = logging.getLogger(__name__)
@@ -17,13 +15,13 @@ def main(argv: Sequence[str] | None = None) -> None:
         level=config.loglevel,
     )
 
-    log.info("-" * 50)
-    log.info("Config successfully parsed.")
-    for line in pprint.pformat(config).split(", "):
-        log.info(line)
-    log.info("-" * 50)
+    if log.isEnabledFor(logging.INFO):
+        banner = ["-" * 50, "Config successfully parsed.", *(f"{field}: {value}" for field, value in config), "-" * 50]
+        log.info("\n".join(banner))
+
+    # Run app. Dash is only imported once the config is parsed, so that e.g. `--help` does not have to wait for it.
+    from ..app.app import POIMapApp
 
-    # Run app
     poi_app = POIMapApp(config)
     poi_app.build()
     poi_app.run()
@@ -1,3 +1,4 @@
+import os
 from datetime import date
 from pathlib import Path
 
@@ -15,6 +16,13 @@ def get_data(file: Path) -> pd.DataFrame:
         return initialize_schema(POIData)  # type:ignore[arg-type]
 
 
+def save_data(df: pd.DataFrame, file: Path) -> None:
+    # Write to a temporary file first so that the database is never left partially written.
+    tmp_file = file.with_name(f".{file.name}.tmp")
+    df.to_parquet(tmp_file)
+    os.replace(tmp_file, file)
+
+
 def initialize_schema(model: pa.DataFrameModel) -> pd.DataFrame:
     schema = model.to_schema()
     return pd.DataFrame(columns=list(schema.columns.keys())).astype(
@@ -34,4 +42,10 @@ class POIData(pa.DataFrameModel):
     @classmethod
     def category_must_be_list(cls, series: Series) -> Series[bool]:
         """Ensure that the category column is a list of strings."""
+        values = series.to_numpy()
+        # Check the types of all categories at once and only fall back to checking row by row to find invalid rows.
+        if all(isinstance(x, np.ndarray) for x in values) and pd.api.types.infer_dtype(
+            np.concatenate([np.empty(0, dtype=object), *values]), skipna=False
+        ) in ("string", "empty"):
+            return pd.Series(True, index=series.index)
         return series.apply(lambda x: isinstance(x, np.ndarray) and all(isinstance(i, str) for i in x))
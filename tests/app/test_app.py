@@ -0,0 +1,275 @@
+import gzip
+import threading
+from datetime import date
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from poi_map.app.app import POIMapApp
+from poi_map.config.models import POIMapConfig
+from poi_map.io.database import save_data
+
+CATEGORIES = ["landmark", "university", "nature"]
+
+
+@pytest.fixture
+def pois():
+    return pd.DataFrame(
+        {
+            "latitude": [49.4106, 49.4039, 49.4122, 49.3987],
+            "longitude": [8.7153, 8.7272, 8.7060, 8.6724],
+            "category": [
+                np.array(["landmark"]),
+                np.array(["landmark", "nature"]),
+                np.array(["university"]),
+                np.array(["nature"]),
+            ],
+            "date": [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3), date(2025, 1, 4)],
+            "title": ["Castle", "Lookout", "University", "Forest"],
+            "description": ["Castle ruins.", "View over the valley.", "Old university.", "Walk in the woods."],
+        }
+    )
+
+
+@pytest.fixture
+def app(tmp_path, pois):
+    database = tmp_path / "poi.parquet"
+    save_data(pois, database)
+    app = POIMapApp(POIMapConfig(title="Test", database=database, categories=CATEGORIES))
+    app.wait_for_data()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    app.build()
+    return app.app.server.test_client()
+
+
+def dispatch(app, client, name, inputs, state, changed):
+    """Run the server callback with the given function name through Dash and return the updated properties."""
+    key, callback = next(
+        (key, callback)
+        for key, callback in app.app.callback_map.items()
+        if "callback" in callback and callback["callback"].__wrapped__.__name__ == name
+    )
+    outputs = [output.split("@")[0].rsplit(".", 1) for output in key.strip(".").split("...")]
+    response = client.post(
+        "/_dash-update-component",
+        json={
+            "output": key,
+            "outputs": [{"id": id, "property": property} for id, property in outputs],
+            "inputs": [{**spec, "value": value} for spec, value in zip(callback["inputs"], inputs, strict=True)],
+            "state": [{**spec, "value": value} for spec, value in zip(callback["state"], state, strict=True)],
+            "changedPropIds": changed,
+        },
+    )
+    assert response.status_code == 200
+    return response.json["response"]
+
+
+class TestValidatePOI:
+    def validate(self, app, **kwargs):
+        poi = {
+            "latitude": 49.41,
+            "longitude": 8.69,
+            "category": ["landmark"],
+            "date": "2025-02-03",
+            "title": "Bridge",
+            "description": "Old bridge.",
+        }
+        return app._validate_poi(**{**poi, **kwargs})
+
+    def test_valid_poi(self, app):
+        assert self.validate(app)
+
+    @pytest.mark.parametrize("category", [[], None, ["castle"], ["landmark", "castle"]])
+    def test_category_must_be_configured(self, app, category):
+        assert not self.validate(app, category=category)
+
+    @pytest.mark.parametrize("longitude", [-180.5, 180.5])
+    def test_longitude_must_be_in_range(self, app, longitude):
+        assert not self.validate(app, longitude=longitude)
+
+    def test_title_is_required(self, app):
+        assert not self.validate(app, title=None)
+
+    def test_errors_are_logged(self, app, caplog):
+        self.validate(app, title=None, longitude=200.0)
+        assert "longitude 200.0 is out of range" in caplog.text
+        assert "title is missing" in caplog.text
+
+
+class TestFilterData:
+    def test_categories(self, app):
+        assert app.filter_data(["landmark"], None, None).tolist() == [0, 1]
+        assert app.filter_data(["university", "nature"], None, None).tolist() == [1, 2, 3]
+
+    def test_date_range_is_inclusive(self, app):
+        assert app.filter_data(CATEGORIES, "2025-01-02", "2025-01-03").tolist() == [1, 2]
+        assert app.filter_data(CATEGORIES, "2025-01-04", "2025-01-04").tolist() == [3]
+
+    def test_start_after_end(self, app):
+        assert app.filter_data(CATEGORIES, "2025-01-03", "2025-01-02").tolist() == []
+
+    def test_no_categories(self, app):
+        assert app.filter_data([], None, None).tolist() == []
+        assert app.filter_data([], "2025-01-01", "2025-01-04").tolist() == []
+
+
+class TestUpdatePOIs:
+    def assert_aligned(self, app):
+        df = app.df
+        assert app.filter_data(CATEGORIES, None, None).tolist() == list(range(len(df)))
+        assert [feature["geometry"]["coordinates"][1] for feature in app.get_markers()] == pytest.approx(
+            df.latitude.tolist(), abs=1e-5
+        )
+        assert all(title in feature["properties"]["tooltip"] for feature, title in zip(app.get_markers(), df.title))
+        assert list(app.get_remove_options().values()) == [f"{t} ({d})" for t, d in zip(df.title, df.description)]
+
+    def test_add_poi(self, app, pois):
+        app.add_pois(pois.iloc[[3]].assign(title="Meadow").reset_index(drop=True))
+
+        assert len(app.df) == 5
+        assert app.df.title.iloc[-1] == "Meadow"
+        assert app.filter_data(["nature"], "2025-01-04", "2025-01-04").tolist() == [3, 4]
+        self.assert_aligned(app)
+
+    def test_remove_poi(self, app):
+        removed = app.remove_poi(1)
+
+        assert removed.title == "Lookout"
+        assert app.df.title.tolist() == ["Castle", "University", "Forest"]
+        assert app.df.index.tolist() == [0, 1, 2]
+        assert app.filter_data(["landmark"], None, None).tolist() == [0]
+        self.assert_aligned(app)
+
+    def test_add_and_remove_pois(self, app, pois):
+        for title in ["Meadow", "Bridge"]:
+            app.add_pois(pois.iloc[[0]].assign(title=title).reset_index(drop=True))
+        app.remove_poi(0)
+        app.remove_poi(3)
+
+        assert app.df.title.tolist() == ["Lookout", "University", "Forest", "Bridge"]
+        self.assert_aligned(app)
+
+    def test_concurrent_adds(self, app, pois):
+        def add_pois():
+            for _ in range(50):
+                app.add_pois(pois.iloc[[0]].reset_index(drop=True))
+
+        threads = [threading.Thread(target=add_pois) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(app.df) == 204
+        self.assert_aligned(app)
+
+
+class TestCreatePOICallback:
+    def test_map_click_does_not_close_modal(self, app, client):
+        # A map click opens the modal in the browser. The server callback sees it closed and must leave it alone.
+        response = dispatch(
+            app,
+            client,
+            "create_poi",
+            inputs=[0, {"latlng": {"lat": 49.41, "lng": 8.69}}],
+            state=[None, None, "2025-02-03", None, False, False],
+            changed=["map.clickData"],
+        )
+
+        assert "add-poi-modal" not in response
+        assert len(app.df) == 4
+
+    def test_create_poi(self, app, client):
+        response = dispatch(
+            app,
+            client,
+            "create_poi",
+            inputs=[1, {"latlng": {"lat": 49.41, "lng": 8.69}}],
+            state=["Bridge", ["landmark"], "2025-02-03", "Old bridge.", True, False],
+            changed=["add-poi-modal-create.n_clicks"],
+        )
+
+        assert response["add-poi-modal"] == {"is_open": False}
+        assert response["new-poi-success"] == {"is_open": True, "children": 'Added POI "Bridge"'}
+        assert app.df.title.tolist()[-1] == "Bridge"
+
+
+class TestServePOIs:
+    def test_route_follows_pathname_prefix(self, monkeypatch, tmp_path, pois):
+        monkeypatch.setenv("DASH_ROUTES_PATHNAME_PREFIX", "/poi/")
+        monkeypatch.setenv("DASH_REQUESTS_PATHNAME_PREFIX", "/poi/")
+        database = tmp_path / "poi.parquet"
+        save_data(pois, database)
+        app = POIMapApp(POIMapConfig(title="Test", database=database, categories=CATEGORIES))
+        app.wait_for_data()
+        app.build()
+
+        response = app.app.server.test_client().get("/poi/pois.geojson")
+
+        assert app.build_map()[1].url == "/poi/pois.geojson"
+        assert response.mimetype == "application/geo+json"
+        assert len(response.json["features"]) == 4
+
+    def test_gzip_and_etags(self, client, monkeypatch):
+        plain = client.get("/pois.geojson")
+        compressed = client.get("/pois.geojson", headers={"Accept-Encoding": "gzip"})
+
+        assert plain.headers.get("Content-Encoding") is None
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(compressed.data) == plain.data
+        assert compressed.headers["ETag"] != plain.headers["ETag"]
+        assert compressed.headers["ETag"].endswith('-gzip"')
+        assert "Accept-Encoding" in compressed.headers["Vary"]
+
+        # The compressed data is cached, neither the route nor the after-request hook compress it again.
+        compress = mock.Mock(wraps=gzip.compress)
+        monkeypatch.setattr("poi_map.app.app.gzip.compress", compress)
+        again = client.get("/pois.geojson", headers={"Accept-Encoding": "gzip"})
+        assert again.data == compressed.data
+        compress.assert_not_called()
+
+    def test_revalidation(self, app, client, pois):
+        for headers in [{}, {"Accept-Encoding": "gzip"}]:
+            etag = client.get("/pois.geojson", headers=headers).headers["ETag"]
+            response = client.get("/pois.geojson", headers={**headers, "If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.data == b""
+
+        etag = client.get("/pois.geojson").headers["ETag"]
+        app.add_pois(pois.iloc[[0]].reset_index(drop=True))
+        response = client.get("/pois.geojson", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json["features"]) == 5
+
+
+class TestStatistics:
+    def statistics(self, app):
+        body = app.get_statistics().children[1]
+        return [(row.children[0].children, row.children[1].children) for row in body.children]
+
+    def test_counts_configured_categories(self, app, pois):
+        assert self.statistics(app) == [("landmark", 2), ("nature", 2), ("university", 1)]
+
+        app.add_pois(pois.iloc[[3]].reset_index(drop=True))
+        assert self.statistics(app) == [("nature", 3), ("landmark", 2), ("university", 1)]
+
+    def test_counts_unconfigured_categories(self, tmp_path, pois):
+        database = tmp_path / "poi.parquet"
+        save_data(pois, database)
+        app = POIMapApp(POIMapConfig(title="Test", database=database, categories=["landmark", "nature"]))
+        app.wait_for_data()
+
+        assert self.statistics(app) == [("landmark", 2), ("nature", 2), ("university", 1)]
+
+        app.add_pois(pois.iloc[[2]].assign(category=[np.array(["university", "museum"])]).reset_index(drop=True))
+        assert self.statistics(app) == [("landmark", 2), ("nature", 2), ("university", 2), ("museum", 1)]
+
+        app.remove_poi(2)
+        app.remove_poi(3)
+        assert self.statistics(app) == [("landmark", 2), ("nature", 2)]
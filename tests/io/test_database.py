@@ -0,0 +1,46 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from poi_map.io.database import get_data, save_data
+
+
+class TestSaveData:
+    def test_round_trip(self, tmp_path):
+        database = tmp_path / "poi.parquet"
+        df = pd.DataFrame(
+            {
+                "latitude": [49.4106, 49.4039],
+                "longitude": [8.7153, 8.7272],
+                "category": [np.array(["landmark"]), np.array(["landmark", "nature"])],
+                "date": [date(2025, 1, 1), date(2025, 1, 2)],
+                "title": ["Castle", "Lookout"],
+                "description": ["Castle ruins.", "View over the valley."],
+            }
+        )
+
+        save_data(df, database)
+        loaded = get_data(database)
+
+        assert [list(categories) for categories in loaded.category] == [["landmark"], ["landmark", "nature"]]
+        pd.testing.assert_frame_equal(loaded.drop(columns="category"), df.drop(columns="category"))
+
+    def test_replaces_existing_database(self, tmp_path):
+        database = tmp_path / "poi.parquet"
+        df = pd.DataFrame(
+            {
+                "latitude": [49.4106],
+                "longitude": [8.7153],
+                "category": [np.array(["landmark"])],
+                "date": [date(2025, 1, 1)],
+                "title": ["Castle"],
+                "description": ["Castle ruins."],
+            }
+        )
+
+        save_data(df, database)
+        save_data(df.iloc[:0], database)
+
+        assert len(get_data(database)) == 0
+        assert [path.name for path in tmp_path.iterdir()] == ["poi.parquet"]